@@ -1,9 +1,45 @@
+import array
+import collections
+import itertools
+import time
+
 import bpy
 from bpy.props import CollectionProperty, StringProperty, IntProperty, BoolProperty
 from bpy.types import Panel, Operator, PropertyGroup, UIList
 from bpy.app.handlers import persistent
 import bmesh
-from mathutils import Vector
+
+
+# Maximum number of positions kept in the history ring buffer
+MAX_HISTORY_ENTRIES = 100
+
+# Rows shown on each side of the active entry in the history list
+LIST_WINDOW = 25
+
+# Moves closer together than this (in seconds) update the newest entry instead of adding one
+RECORD_INTERVAL = 0.1
+
+# Bulk inserts smaller than this write slot by slot instead of copying the whole ring
+BULK_WRITE_MIN = 16
+
+# Seconds between a cursor move and writing the queued moves into the history
+FLUSH_INTERVAL = 0.1
+
+# Mirrors is_recording so the move callback can bail out without touching RNA
+_RECORDING = False
+
+# Cursor moves as (time, x, y, z), waiting to be written into the history
+_PENDING = collections.deque(maxlen=MAX_HISTORY_ENTRIES)
+
+# time.time() of the last added entry, used to coalesce rapid moves
+_last_record_time = 0.0
+
+# Row numbers of the history list by slot, counting only entries that
+# were not deleted. Filled in by filter_items before the rows are drawn.
+_row_numbers = {}
+
+# Formatted "Current Position" labels, rebuilt only when the cursor moves
+_pos_cache = {"key": None, "strs": ("", "", "")}
 
 
 # Property group to store cursor history entries
@@ -15,25 +51,65 @@ class CursorHistoryEntry(PropertyGroup):
         subtype='TRANSLATION'
     )
 
-    timestamp: StringProperty(
+    timestamp: IntProperty(
         name="Time",
-        description="When this position was recorded"
+        description="When this position was recorded (seconds since the epoch)"
+    )
+
+    display_cache: StringProperty(
+        name="Display",
+        description="Preformatted label, rebuilt whenever the entry changes"
+    )
+
+    deleted: BoolProperty(
+        name="Deleted",
+        description="Entry was deleted and is hidden until its slot is reused"
     )
 
 
 # Custom UIList for displaying cursor history
 class CURSOR_UL_history_list(UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        number = _row_numbers.get(index, 0)
         if self.layout_type in {'DEFAULT', 'COMPACT'}:
             row = layout.row(align=True)
-            row.label(text=f"{index + 1}:")
-            row.label(text=f"X: {item.location[0]:.3f}")
-            row.label(text=f"Y: {item.location[1]:.3f}")
-            row.label(text=f"Z: {item.location[2]:.3f}")
-            row.label(text=item.timestamp)
+            row.label(text=f"{number}:")
+            row.label(text=item.display_cache)
+            row.label(text=time.strftime("%H:%M:%S", time.localtime(item.timestamp)))
         elif self.layout_type in {'GRID'}:
             layout.alignment = 'CENTER'
-            layout.label(text=f"{index + 1}")
+            layout.label(text=f"{number}")
+
+    def filter_items(self, context, data, propname):
+        # Hide unused ring buffer slots and show the rest oldest first,
+        # limited to a window of rows around the active entry
+        slots = getattr(data, propname)
+        count = data.count
+        oldest = data.head - count
+        if _is_live_slot(data, data.active_index):
+            center = (data.active_index - oldest) % MAX_HISTORY_ENTRIES
+        else:
+            center = count - 1
+        low = max(center - LIST_WINDOW, 0)
+        high = min(center + LIST_WINDOW, count - 1)
+
+        deleted = [False] * len(slots)
+        slots.foreach_get("deleted", deleted)
+
+        # Number the remaining entries for draw_item, skipping deleted ones
+        _row_numbers.clear()
+        flags = [0] * len(slots)
+        order = [(slot - oldest) % MAX_HISTORY_ENTRIES for slot in range(len(slots))]
+        number = 0
+        for position in range(count):
+            slot = (oldest + position) % MAX_HISTORY_ENTRIES
+            if deleted[slot]:
+                continue
+            number += 1
+            _row_numbers[slot] = number
+            if low <= position <= high:
+                flags[slot] = self.bitflag_filter_item
+        return flags, order
 
 
 # Operator to start recording
@@ -43,11 +119,15 @@ class CURSOR_OT_start_recording(Operator):
     bl_description = "Start recording 3D cursor position changes"
 
     def execute(self, context):
+        global _RECORDING
         props = context.scene.cursor_history_props
         props.is_recording = True
+        _RECORDING = True
+        _subscribe_cursor_location()
 
         # Set the last cursor position to current position to avoid duplicate recording
-        current_pos = context.scene.cursor.location.copy()
+        cursor_pos = context.scene.cursor.location
+        current_pos = (cursor_pos[0], cursor_pos[1], cursor_pos[2])
         props.last_cursor_pos = current_pos
 
         # Add current cursor position as first entry
@@ -64,7 +144,12 @@ class CURSOR_OT_stop_recording(Operator):
     bl_description = "Stop recording 3D cursor position changes"
 
     def execute(self, context):
+        global _RECORDING
+        # Keep the moves made just before stopping
+        _flush_pending_moves()
         context.scene.cursor_history_props.is_recording = False
+        _RECORDING = False
+        _unsubscribe_cursor_location()
         self.report({'INFO'}, "Stopped recording cursor history")
         return {'FINISHED'}
 
@@ -77,10 +162,14 @@ class CURSOR_OT_delete_entry(Operator):
 
     def execute(self, context):
         props = context.scene.cursor_history_props
-        if props.history_list and props.active_index >= 0:
-            props.history_list.remove(props.active_index)
-            if props.active_index >= len(props.history_list):
-                props.active_index = len(props.history_list) - 1
+        slot = props.active_index
+        if _is_live_slot(props, slot):
+            # Mark the entry as deleted instead of shifting the newer entries down
+            props.history_list[slot].deleted = True
+            props.deleted_count += 1
+            props.active_index = _nearest_live_slot(props, slot)
+            _trim_deleted(props)
+            _update_header_label(props)
             self.report({'INFO'}, "Deleted cursor history entry")
         return {'FINISHED'}
 
@@ -92,8 +181,14 @@ class CURSOR_OT_clear_history(Operator):
     bl_description = "Clear all cursor history entries"
 
     def execute(self, context):
-        context.scene.cursor_history_props.history_list.clear()
-        context.scene.cursor_history_props.active_index = 0
+        props = context.scene.cursor_history_props
+        _PENDING.clear()
+        # Slots are kept allocated and simply reused
+        props.head = 0
+        props.count = 0
+        props.deleted_count = 0
+        props.active_index = 0
+        _update_header_label(props)
         self.report({'INFO'}, "Cleared cursor history")
         return {'FINISHED'}
 
@@ -106,22 +201,33 @@ class CURSOR_OT_jump_to_position(Operator):
 
     def execute(self, context):
         props = context.scene.cursor_history_props
-        if props.history_list and props.active_index >= 0:
-            entry = props.history_list[props.active_index]
-            # Temporarily stop recording to avoid adding this position change
-            was_recording = props.is_recording
-            props.is_recording = False
+        slot = props.active_index
+        if _is_live_slot(props, slot):
+            # Record queued moves first; they may reuse the selected slot
+            head = props.head
+            added = _write_pending_moves()
+            if (slot - head) % MAX_HISTORY_ENTRIES < added:
+                self.report({'WARNING'}, "Selected entry was replaced by newer history")
+                return {'CANCELLED'}
+
+            # Writing the moves selects the newest entry, so restore the selection
+            props.active_index = slot
+            entry = props.history_list[slot]
             context.scene.cursor.location = entry.location
-            # Update last_cursor_pos to prevent duplicate recording when resuming
+            # Update last_cursor_pos so the jump itself is not recorded
             props.last_cursor_pos = entry.location
-            props.is_recording = was_recording
-            self.report({'INFO'}, f"Moved cursor to position {props.active_index + 1}")
+            self.report({'INFO'}, f"Moved cursor to position {_history_number(props, slot)}")
         return {'FINISHED'}
 
 
 # Property group to hold all cursor history data
 class CursorHistoryProperties(PropertyGroup):
+    # Fixed-size slot storage used as a ring buffer of MAX_HISTORY_ENTRIES entries
     history_list: CollectionProperty(type=CursorHistoryEntry)
+    head: IntProperty(default=0)  # Slot the next entry is written to
+    count: IntProperty(default=0)  # Number of recorded entries, including deleted ones
+    deleted_count: IntProperty(default=0)  # Number of deleted entries still in the ring
+    header_label: StringProperty(default="History (0 entries):")  # Rebuilt when entries change
     active_index: IntProperty(default=0)
     is_recording: BoolProperty(default=False)
     last_cursor_pos: bpy.props.FloatVectorProperty(size=3)
@@ -152,20 +258,28 @@ class CURSOR_PT_history_panel(Panel):
 
         # Current cursor position
         cursor_pos = context.scene.cursor.location
+        key = (cursor_pos[0], cursor_pos[1], cursor_pos[2])
+        if key != _pos_cache["key"]:
+            _pos_cache.update(
+                key=key,
+                strs=(f"X: {key[0]:.3f}", f"Y: {key[1]:.3f}", f"Z: {key[2]:.3f}"),
+            )
+        x_str, y_str, z_str = _pos_cache["strs"]
+
         col = layout.column(align=True)
         col.label(text="Current Position:")
         row = col.row(align=True)
-        row.label(text=f"X: {cursor_pos[0]:.3f}")
-        row.label(text=f"Y: {cursor_pos[1]:.3f}")
-        row.label(text=f"Z: {cursor_pos[2]:.3f}")
+        row.label(text=x_str)
+        row.label(text=y_str)
+        row.label(text=z_str)
 
         layout.separator()
 
         # History list
         col = layout.column()
-        col.label(text=f"History ({len(props.history_list)} entries):")
+        col.label(text=props.header_label)
 
-        if props.history_list:
+        if props.count:
             col.template_list(
                 "CURSOR_UL_history_list", "",
                 props, "history_list",
@@ -183,42 +297,316 @@ class CURSOR_PT_history_panel(Panel):
             col.label(text="No history entries")
 
 
+# Ring buffer helpers: map storage slots to history positions (0 = oldest)
+def _history_position(props, slot):
+    oldest = props.head - props.count
+    return (slot - oldest) % MAX_HISTORY_ENTRIES
+
+
+def _is_live_slot(props, slot):
+    return (
+        0 <= slot < len(props.history_list)
+        and _history_position(props, slot) < props.count
+        and not props.history_list[slot].deleted
+    )
+
+
+def _history_number(props, slot):
+    # Row number of a slot as shown in the list, skipping deleted entries
+    deleted = [False] * len(props.history_list)
+    props.history_list.foreach_get("deleted", deleted)
+    oldest = props.head - props.count
+    position = _history_position(props, slot)
+    return sum(not deleted[(oldest + p) % MAX_HISTORY_ENTRIES] for p in range(position + 1))
+
+
+def _nearest_live_slot(props, slot):
+    # Prefer the next newer entry, like removing from a list, then fall back to older ones
+    position = _history_position(props, slot)
+    oldest = props.head - props.count
+    positions = itertools.chain(range(position + 1, props.count), range(position - 1, -1, -1))
+    for candidate in positions:
+        candidate_slot = (oldest + candidate) % MAX_HISTORY_ENTRIES
+        if not props.history_list[candidate_slot].deleted:
+            return candidate_slot
+    return 0
+
+
+def _trim_deleted(props):
+    # Drop deleted entries from both ends of the ring so they free their slots
+    slots = props.history_list
+    while props.count and slots[(props.head - 1) % MAX_HISTORY_ENTRIES].deleted:
+        props.head = (props.head - 1) % MAX_HISTORY_ENTRIES
+        props.count -= 1
+        props.deleted_count -= 1
+    while props.count and slots[(props.head - props.count) % MAX_HISTORY_ENTRIES].deleted:
+        props.count -= 1
+        props.deleted_count -= 1
+
+
+def _ensure_slots(props):
+    # Allocate all slots once so the collection never grows or shrinks afterwards
+    while len(props.history_list) < MAX_HISTORY_ENTRIES:
+        props.history_list.add()
+
+
+def _update_header_label(props):
+    props.header_label = f"History ({props.count - props.deleted_count} entries):"
+
+
+def _format_location(loc):
+    return f"X: {loc[0]:.3f}  Y: {loc[1]:.3f}  Z: {loc[2]:.3f}"
+
+
+def _update_display_cache(entry):
+    entry.display_cache = _format_location(entry.location)
+
+
+def _parse_legacy_timestamp(value):
+    # Older files stored only the time of day as "HH:MM:SS", so assume today
+    try:
+        clock = time.strptime(value, "%H:%M:%S")
+    except (TypeError, ValueError):
+        return 0
+    return int(time.mktime(time.localtime()[:3] + clock[3:6] + (0, 0, -1)))
+
+
+def _migrate_history(props):
+    # Files saved before the ring buffer have a plain list and no head/count
+    if props.get("count") is not None or not props.history_list:
+        return
+
+    count = min(len(props.history_list), MAX_HISTORY_ENTRIES)
+    for entry in props.history_list:
+        entry.timestamp = _parse_legacy_timestamp(entry.get("timestamp"))
+        entry.deleted = False
+        _update_display_cache(entry)
+
+    props.count = count
+    props.head = count % MAX_HISTORY_ENTRIES
+    props.deleted_count = 0
+    props.active_index = count - 1
+    _ensure_slots(props)
+    _update_header_label(props)
+
+
+def _migrate_all_scenes():
+    for scene in bpy.data.scenes:
+        _migrate_history(scene.cursor_history_props)
+
+
 # Function to add a new cursor history entry
 def add_cursor_history_entry(location):
-    import datetime
-
+    global _last_record_time
     props = bpy.context.scene.cursor_history_props
-    entry = props.history_list.add()
+    _ensure_slots(props)
+
+    # Write into the next slot, overwriting the oldest entry once the buffer is full
+    slot = props.head
+    entry = props.history_list[slot]
     entry.location = location
-    entry.timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    entry.timestamp = int(time.time())
+    entry.deleted = False
+    _update_display_cache(entry)
 
-    # Keep list at reasonable size (optional)
-    max_entries = 100
-    if len(props.history_list) > max_entries:
-        props.history_list.remove(0)
+    props.head = (slot + 1) % MAX_HISTORY_ENTRIES
+    props.count = min(props.count + 1, MAX_HISTORY_ENTRIES)
+    _last_record_time = time.time()
+    _trim_deleted(props)
+    _update_header_label(props)
 
     # Update active index to show newest entry
-    props.active_index = len(props.history_list) - 1
+    props.active_index = slot
 
 
-# Handler to detect cursor position changes
-@persistent
-def cursor_position_handler(scene, depsgraph=None):
-    if not hasattr(scene, 'cursor_history_props'):
+# Function to add several cursor history entries at once, e.g. when replaying moves
+def add_cursor_history_entries(locations, timestamps):
+    if len(locations) != len(timestamps):
+        raise ValueError("locations and timestamps must have the same length")
+
+    # Only the newest MAX_HISTORY_ENTRIES entries can be kept
+    locations = locations[-MAX_HISTORY_ENTRIES:]
+    timestamps = timestamps[-MAX_HISTORY_ENTRIES:]
+    count = len(locations)
+    if not count:
         return
 
+    props = bpy.context.scene.cursor_history_props
+    _ensure_slots(props)
+    slots = props.history_list
+    head = props.head
+
+    # Slots written once the ring is full held the oldest entries, deleted or not
+    first_evicted = MAX_HISTORY_ENTRIES - props.count
+
+    if count < BULK_WRITE_MIN:
+        # A few entries are cheaper to write slot by slot than to copy the whole ring
+        for i in range(count):
+            entry = slots[(head + i) % MAX_HISTORY_ENTRIES]
+            if i >= first_evicted and entry.deleted:
+                props.deleted_count -= 1
+            entry.location = locations[i]
+            entry.timestamp = timestamps[i]
+            entry.deleted = False
+    else:
+        # Read the whole ring, patch the new slots and write it back in one call per field
+        ring_locations = array.array('f', bytes(4 * 3 * MAX_HISTORY_ENTRIES))
+        ring_timestamps = array.array('i', bytes(4 * MAX_HISTORY_ENTRIES))
+        ring_deleted = [False] * MAX_HISTORY_ENTRIES
+        slots.foreach_get("location", ring_locations)
+        slots.foreach_get("timestamp", ring_timestamps)
+        slots.foreach_get("deleted", ring_deleted)
+
+        new_locations = array.array('f', itertools.chain.from_iterable(locations))
+        new_timestamps = array.array('i', timestamps)
+
+        props.deleted_count -= sum(
+            ring_deleted[(head + i) % MAX_HISTORY_ENTRIES] for i in range(first_evicted, count)
+        )
+
+        # Entries past the end of the storage wrap around to slot 0
+        first = min(count, MAX_HISTORY_ENTRIES - head)
+        ring_locations[3 * head:3 * (head + first)] = new_locations[:3 * first]
+        ring_locations[:3 * (count - first)] = new_locations[3 * first:]
+        ring_timestamps[head:head + first] = new_timestamps[:first]
+        ring_timestamps[:count - first] = new_timestamps[first:]
+        ring_deleted[head:head + first] = [False] * first
+        ring_deleted[:count - first] = [False] * (count - first)
+
+        slots.foreach_set("location", ring_locations)
+        slots.foreach_set("timestamp", ring_timestamps)
+        slots.foreach_set("deleted", ring_deleted)
+
+    # Labels are strings, which foreach_set cannot write
+    for i, location in enumerate(locations):
+        slots[(head + i) % MAX_HISTORY_ENTRIES].display_cache = _format_location(location)
+
+    props.head = (head + count) % MAX_HISTORY_ENTRIES
+    props.count = min(props.count + count, MAX_HISTORY_ENTRIES)
+    props.active_index = (props.head - 1) % MAX_HISTORY_ENTRIES
+    _trim_deleted(props)
+    _update_header_label(props)
+
+
+# Owner of the message bus subscription, used to remove it again
+_msgbus_owner = object()
+
+
+# Message bus callback, notified only when the 3D cursor location changes.
+# Moves are only queued here and written into the history by a timer.
+def _on_cursor_moved():
+    if not _RECORDING:
+        return
+
+    cp = bpy.context.scene.cursor.location
+    _PENDING.append((time.time(), cp[0], cp[1], cp[2]))
+
+    if not bpy.app.timers.is_registered(_flush_pending_moves):
+        bpy.app.timers.register(_flush_pending_moves, first_interval=FLUSH_INTERVAL)
+
+
+# Write all queued cursor moves into the history at once.
+# Returns the number of entries added.
+def _write_pending_moves():
+    global _last_record_time
+    scene = bpy.context.scene
+    if scene is None or not scene.cursor_history_props.is_recording:
+        _PENDING.clear()
+        return 0
+
     props = scene.cursor_history_props
+    lx, ly, lz = props.last_cursor_pos
+    last_time = _last_record_time
+    latest = None  # New location for the newest entry already in the history
+    locations = []
+    timestamps = []
+
+    while _PENDING:
+        t, x, y, z = _PENDING.popleft()
+
+        # Check if position has changed (squared distance, same 0.001 tolerance)
+        dx = x - lx
+        dy = y - ly
+        dz = z - lz
+        if dx * dx + dy * dy + dz * dz <= 1e-6:
+            continue
+        lx, ly, lz = x, y, z
+
+        # Coalesce rapid moves (e.g. dragging) into the newest entry
+        if 0.0 <= t - last_time < RECORD_INTERVAL and (locations or props.count):
+            if locations:
+                locations[-1] = (x, y, z)
+            else:
+                latest = (x, y, z)
+        else:
+            locations.append((x, y, z))
+            timestamps.append(int(t))
+            last_time = t
+
+    if latest is not None:
+        entry = props.history_list[(props.head - 1) % MAX_HISTORY_ENTRIES]
+        entry.location = latest
+        _update_display_cache(entry)
+    if locations:
+        add_cursor_history_entries(locations, timestamps)
+    _last_record_time = last_time
+    props.last_cursor_pos = (lx, ly, lz)
+    return len(locations)
+
+
+# Timer callback for _write_pending_moves
+def _flush_pending_moves():
+    _write_pending_moves()
+    return None
+
+
+# The subscription only exists while recording, so an idle addon costs nothing
+def _subscribe_cursor_location():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.View3DCursor, "location"),
+        owner=_msgbus_owner,
+        args=(),
+        notify=_on_cursor_moved,
+    )
 
-    if not props.is_recording:
-        return
 
-    current_pos = scene.cursor.location.copy()
-    last_pos = Vector(props.last_cursor_pos)
+def _unsubscribe_cursor_location():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
 
-    # Check if position has changed (with small tolerance for floating point)
-    if (current_pos - last_pos).length > 0.001:
-        add_cursor_history_entry(current_pos)
-        props.last_cursor_pos = current_pos
+
+# Pick up the scene's recording state after it was replaced behind our back,
+# holding the cursor subscription only while recording
+def _sync_recording_state():
+    global _RECORDING
+    scene = bpy.context.scene
+    _RECORDING = scene is not None and scene.cursor_history_props.is_recording
+
+    if _RECORDING:
+        _subscribe_cursor_location()
+    else:
+        _unsubscribe_cursor_location()
+
+
+# Convert history saved by older versions and pick up the recording
+# state of the open file. Also used as a one-shot timer after registering.
+def _sync_open_file():
+    _migrate_all_scenes()
+    _sync_recording_state()
+
+
+# Subscriptions are dropped when a file is loaded, so subscribe again if needed
+@persistent
+def load_post_handler(*args):
+    # Moves queued in the previous file must not end up in this one
+    _PENDING.clear()
+    _sync_open_file()
+
+
+# Undo and redo restore is_recording without going through the operators
+@persistent
+def undo_redo_handler(*args):
+    _sync_recording_state()
 
 
 # Registration
@@ -243,15 +631,31 @@ def register():
         type=CursorHistoryProperties
     )
 
-    # Add the handler
-    if cursor_position_handler not in bpy.app.handlers.depsgraph_update_post:
-        bpy.app.handlers.depsgraph_update_post.append(cursor_position_handler)
+    # Cursor movement is subscribed to when recording starts
+    if load_post_handler not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(load_post_handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if undo_redo_handler not in handlers:
+            handlers.append(undo_redo_handler)
+
+    # The open file may hold old history or already be recording
+    if not bpy.app.timers.is_registered(_sync_open_file):
+        bpy.app.timers.register(_sync_open_file, first_interval=0.0)
 
 
 def unregister():
-    # Remove the handler
-    if cursor_position_handler in bpy.app.handlers.depsgraph_update_post:
-        bpy.app.handlers.depsgraph_update_post.remove(cursor_position_handler)
+    # Stop listening for cursor movement
+    if load_post_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(load_post_handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if undo_redo_handler in handlers:
+            handlers.remove(undo_redo_handler)
+    if bpy.app.timers.is_registered(_sync_open_file):
+        bpy.app.timers.unregister(_sync_open_file)
+    _unsubscribe_cursor_location()
+    if bpy.app.timers.is_registered(_flush_pending_moves):
+        bpy.app.timers.unregister(_flush_pending_moves)
+    _PENDING.clear()
 
     del bpy.types.Scene.cursor_history_props
 